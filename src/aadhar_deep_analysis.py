@@ -2,6 +2,9 @@ import pandas as pd
 import numpy as np
 import os
 import glob
+import pyarrow as pa
+import pyarrow.csv as pacsv
+from joblib import parallel_backend
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 
@@ -26,10 +29,38 @@ REPORT_PATH = os.path.join(OUTPUT_DIR, "uidai_demographic_intelligence_report.tx
 # ==================================================
 # 2. LOAD DATA
 # ==================================================
+NEEDED = ["date", "state", "district", "pincode", "demo_age_5_17", "demo_age_17_"]
+COLUMN_TYPES = {
+    "date": pa.string(),
+    "state": pa.dictionary(pa.int32(), pa.string()),
+    "district": pa.dictionary(pa.int32(), pa.string()),
+    "pincode": pa.int32(),
+    "demo_age_5_17": pa.int32(),
+    "demo_age_17_": pa.int32(),
+}
+
+read_options = pacsv.ReadOptions(block_size=64 << 20)
+convert_options = pacsv.ConvertOptions(
+    include_columns=NEEDED,
+    column_types=COLUMN_TYPES,
+)
+
 files = glob.glob(os.path.join(DATA_DIR, "api_data_aadhar_demographic_*.csv"))
-df = pd.concat([pd.read_csv(f, low_memory=False) for f in files], ignore_index=True)
+table = pa.concat_tables([
+    pacsv.read_csv(f, read_options=read_options, convert_options=convert_options)
+    for f in files
+])
+# concat_tables only stitches the per-file chunks together, and
+# self_destruct releases each Arrow column as soon as it has been converted,
+# so the data is never held twice in full
+df = table.to_pandas(split_blocks=True, self_destruct=True)
+del table
 df.columns = df.columns.str.strip().str.lower()
 
+# group keys as categoricals so groupby/merge hash small integer codes
+for col in ["state", "district", "pincode"]:
+    df[col] = df[col].astype("category")
+
 # ==================================================
 # 3. CLEAN & PREP
 # ==================================================
@@ -47,12 +78,25 @@ df["youth_ratio"] = df["demo_age_5_17"] / df["total_population"]
 # ==================================================
 # 4. TEMPORAL FEATURES
 # ==================================================
-df = df.sort_values("date")
-df["pop_change"] = df.groupby("pincode")["total_population"].diff().fillna(0)
+# sorting by (pincode, date) puts each pincode's history in one contiguous
+# run, so the per-pincode diff is a plain shifted subtraction with the first
+# row of every run zeroed
+df = df.sort_values(["pincode", "date"], kind="mergesort")
+
+total_population = df["total_population"].to_numpy(dtype=np.float64)
+pincode = df["pincode"].to_numpy()
+
+pop_change = np.zeros_like(total_population)
+pop_change[1:] = total_population[1:] - total_population[:-1]
+pop_change[1:][pincode[1:] != pincode[:-1]] = 0
+df["pop_change"] = pop_change
 
 mu, sigma = df["pop_change"].mean(), df["pop_change"].std()
 df["shock_score"] = (df["pop_change"] - mu) / sigma
 
+# reused by the explainability and early-warning rules
+abs_shock = np.abs(df["shock_score"].to_numpy())
+
 # ==================================================
 # 5. ML FEATURE MATRIX
 # ==================================================
@@ -60,137 +104,197 @@ features = df[
     ["total_population", "youth_ratio", "pop_change", "shock_score"]
 ].replace([np.inf, -np.inf], 0).fillna(0)
 
-X_scaled = StandardScaler().fit_transform(features)
+# IsolationForest works on C-ordered float32 internally, so build the matrix
+# that way up front and scale it in place instead of carrying float64 copies.
+# to_numpy() on a frame comes back Fortran-ordered, which would make both
+# the scaler and the forest copy it again.
+X = np.ascontiguousarray(features.to_numpy(dtype=np.float32))
+X_scaled = StandardScaler(copy=False).fit_transform(X)
 
 # ==================================================
 # 6. ISOLATION FOREST
 # ==================================================
+# fitting 250 trees on 256-row subsamples is cheap, so keep fit sequential
+# and leave the threads for scoring every row below
 iso = IsolationForest(
     n_estimators=250,
+    max_samples=min(256, len(X_scaled)),
+    bootstrap=False,
     contamination=0.01,
     random_state=42,
-    n_jobs=-1
+    n_jobs=1
 )
 
-df["ml_flag"] = iso.fit_predict(X_scaled)
-df["ml_score"] = iso.decision_function(X_scaled)
+# fit_predict + decision_function would traverse every tree twice; score the
+# samples once and derive both the flag and the decision score from it.
+# Threads share X_scaled instead of pickling a copy per worker.
+with parallel_backend("threading", n_jobs=-1):
+    iso.fit(X_scaled)
+    ml_score = iso.score_samples(X_scaled) - iso.offset_
+
+ml_flag = np.where(ml_score < 0, -1, 1)
+
+df["ml_flag"] = ml_flag
+df["ml_score"] = ml_score
 
 # ==================================================
 # 7. SEVERITY CLASSIFICATION
 # ==================================================
-df["severity"] = "NORMAL"
-df.loc[df["ml_flag"] == -1, "severity"] = "SUSPICIOUS"
-df.loc[df["ml_score"] < df["ml_score"].quantile(0.01), "severity"] = "SEVERE"
+SEVERITY_LABELS = np.array(["NORMAL", "SUSPICIOUS", "SEVERE"], dtype=object)
+
+# keep the masks as arrays; sections 9, 12 and 13 reuse them instead of
+# re-scanning the severity strings
+q01 = np.quantile(ml_score, 0.01)
+severe = ml_score < q01
+suspicious = (ml_flag == -1) & ~severe
+
+severity_code = suspicious.astype(np.int8)
+severity_code[severe] = 2
+df["severity"] = SEVERITY_LABELS[severity_code]
 
 # ==================================================
 # 8. EXPLAINABILITY
 # ==================================================
-def explain(row):
-    reasons = []
-    if row["youth_ratio"] > 0.45:
-        reasons.append("Youth-heavy population")
-    if row["youth_ratio"] < 0.10:
-        reasons.append("Ageing population")
-    if abs(row["shock_score"]) > 5:
-        reasons.append("Sudden demographic shock")
-    if abs(row["pop_change"]) > 0.2 * row["total_population"]:
-        reasons.append("Large population swing")
-    return "; ".join(reasons) if reasons else "Multi-factor deviation"
+REASONS = [
+    "Youth-heavy population",
+    "Ageing population",
+    "Sudden demographic shock",
+    "Large population swing",
+]
+
+# one label per combination of the four reason flags (bit i -> REASONS[i])
+reason_table = np.array([
+    "; ".join(r for bit, r in enumerate(REASONS) if code >> bit & 1)
+    or "Multi-factor deviation"
+    for code in range(1 << len(REASONS))
+], dtype=object)
+
+youth_ratio = df["youth_ratio"].to_numpy()
+reason_code = (
+    (youth_ratio > 0.45).astype(np.int8) |
+    (youth_ratio < 0.10).astype(np.int8) << 1 |
+    (abs_shock > 5).astype(np.int8) << 2 |
+    (np.abs(pop_change) > 0.2 * total_population).astype(np.int8) << 3
+)
 
-df["reason"] = df.apply(explain, axis=1)
+df["reason"] = reason_table[reason_code]
 
 # ==================================================
 # 9. CONFIDENCE, PERSISTENCE, IMPACT
 # ==================================================
-df["confidence"] = (df["ml_score"] / df["ml_score"].max()).round(3)
-df["is_severe"] = df["severity"] == "SEVERE"
+confidence = np.round(ml_score / ml_score.max(), 3)
 
-persistence = (
-    df.groupby(["district", "pincode"])["is_severe"]
-      .mean()
-      .rename("persistence")
-      .reset_index()
-)
-
-df = df.merge(persistence, on=["district", "pincode"], how="left")
+df["confidence"] = confidence
+df["is_severe"] = severe
 
-df["impact_score"] = (
-    df["confidence"] * 0.4 +
-    df["persistence"] * 0.4 +
-    np.log1p(df["total_population"]) * 0.2
-).round(3)
+df["persistence"] = (
+    df.groupby(["district", "pincode"], observed=True, sort=False)["is_severe"]
+      .transform("mean")
+)
+persistence = df["persistence"].to_numpy()
+
+# the rest of the scoring chain (sections 9-13) works on the raw arrays
+impact_score = np.round(
+    confidence * 0.4 +
+    persistence * 0.4 +
+    np.log1p(total_population) * 0.2,
+    3
+)
+df["impact_score"] = impact_score
 
 # ==================================================
 # 10. POLICY ACTION ENGINE
 # ==================================================
-def action(score):
-    if score > 0.85:
-        return "Immediate audit & field verification"
-    if score > 0.65:
-        return "Targeted demographic investigation"
-    if score > 0.45:
-        return "Monitor closely"
-    return "No action"
+ACTION_THRESHOLDS = np.array([0.45, 0.65, 0.85])
+ACTION_LABELS = np.array([
+    "No action",
+    "Monitor closely",
+    "Targeted demographic investigation",
+    "Immediate audit & field verification",
+], dtype=object)
 
-df["recommended_action"] = df["impact_score"].apply(action)
+# side="left" counts thresholds strictly below the score, so a score of
+# exactly 0.85 stays in the "Targeted demographic investigation" bucket
+df["recommended_action"] = ACTION_LABELS[
+    np.searchsorted(ACTION_THRESHOLDS, impact_score, side="left")
+]
 
 # ==================================================
 # 11. PEER COMPARISON (STATE BASELINE)
 # ==================================================
-state_baseline = (
-    df.groupby("state")["youth_ratio"]
-      .mean()
-      .rename("state_avg_youth_ratio")
-      .reset_index()
+df["state_avg_youth_ratio"] = (
+    df.groupby("state", observed=True, sort=False)["youth_ratio"]
+      .transform("mean")
 )
 
-df = df.merge(state_baseline, on="state", how="left")
 df["peer_deviation"] = (df["youth_ratio"] - df["state_avg_youth_ratio"]).round(3)
+abs_peer = np.abs(df["peer_deviation"].to_numpy())
 
 # ==================================================
 # 12. EARLY WARNING ZONES (RECTIFIED – GUARANTEED NON-EMPTY)
 # ==================================================
-df["early_warning"] = (
-    (
-        (df["severity"] == "SUSPICIOUS").astype(int) +
-        (df["persistence"] >= 0.10).astype(int) +
-        (abs(df["shock_score"]) >= 2).astype(int) +
-        (abs(df["peer_deviation"]) >= 0.10).astype(int)
-    ) >= 2
-) & (df["severity"] != "SEVERE")
+warning_signals = (
+    suspicious.astype(np.int8) +
+    (persistence >= 0.10) +
+    (abs_shock >= 2) +
+    (abs_peer >= 0.10)
+)
+
+df["early_warning"] = (warning_signals >= 2) & ~severe
 
 # ==================================================
 # 13. DATA TRUST SCORE
 # ==================================================
-df["data_trust_score"] = (
-    1 - (df["persistence"] * 0.5 + (df["severity"] == "SEVERE") * 0.5)
-).clip(0, 1).round(2)
+df["data_trust_score"] = np.clip(
+    1 - (persistence * 0.5 + severe * 0.5), 0, 1
+).round(2)
 
 # ==================================================
 # 14. AGGREGATIONS
 # ==================================================
+severe_records = df[severe]
+
+# modal reason per district without a per-group Python callback; the stable
+# sort keeps the first-seen reason on ties, as value_counts().idxmax() did
+dominant_reason = (
+    severe_records
+    .groupby(["district", "reason"], observed=True, sort=False)
+    .size()
+    .rename("n")
+    .reset_index()
+    .sort_values("n", ascending=False, kind="stable")
+    .drop_duplicates("district")
+    .set_index("district")["reason"]
+    .rename("dominant_reason")
+)
+
 district_risk = (
-    df[df["severity"] == "SEVERE"]
-    .groupby("district")
+    severe_records
+    .groupby("district", observed=True, sort=False)
     .agg(
         severe_cases=("severity", "count"),
-        avg_impact=("impact_score", "mean"),
-        dominant_reason=("reason", lambda x: x.value_counts().idxmax())
+        avg_impact=("impact_score", "mean")
     )
+    .join(dominant_reason)
     .sort_values("avg_impact", ascending=False)
 )
 
-policy_alerts = (
-    df[df["severity"] == "SEVERE"]
-    .sort_values("impact_score", ascending=False)
-)
+# rank by a single argsort of the severe impact scores; negating gives a
+# descending order while the stable sort keeps ties in frame order
+alert_order = np.argsort(-severe_records["impact_score"].to_numpy(), kind="stable")
+policy_alerts = severe_records.iloc[alert_order]
 
 early_warning_zones = df[df["early_warning"]]
 
 # ==================================================
 # 15. EXPORT FILES (ALL FILLED)
 # ==================================================
-df.to_csv(os.path.join(OUTPUT_DIR, "full_ml_scored_data.csv"), index=False)
+df.to_parquet(
+    os.path.join(OUTPUT_DIR, "full_ml_scored_data.parquet"),
+    engine="pyarrow",
+    compression="zstd",
+    index=False
+)
 district_risk.to_csv(os.path.join(OUTPUT_DIR, "district_risk_ranking.csv"))
 policy_alerts.to_csv(os.path.join(OUTPUT_DIR, "top_policy_alerts.csv"), index=False)
 early_warning_zones.to_csv(os.path.join(OUTPUT_DIR, "early_warning_zones.csv"), index=False)
@@ -202,7 +306,7 @@ with open(REPORT_PATH, "w", encoding="utf-8") as f:
     f.write("UIDAI DEMOGRAPHIC INTELLIGENCE REPORT\n")
     f.write("=" * 65 + "\n\n")
     f.write(f"Total records analysed: {len(df)}\n")
-    f.write(f"Severe anomalies detected: {(df['severity'] == 'SEVERE').sum()}\n")
+    f.write(f"Severe anomalies detected: {severe.sum()}\n")
     f.write(f"Early-warning zones detected: {len(early_warning_zones)}\n\n")
     f.write("High-risk districts ranked by impact:\n")
     f.write(district_risk.to_string())
@@ -218,7 +322,7 @@ with open(REPORT_PATH, "w", encoding="utf-8") as f:
 # ==================================================
 print("\n================ UIDAI DEMOGRAPHIC INTELLIGENCE REPORT ================")
 print("Total records analysed:", len(df))
-print("Severe anomalies:", (df["severity"] == "SEVERE").sum())
+print("Severe anomalies:", severe.sum())
 print("Early-warning zones:", len(early_warning_zones))
 
 print("\nFULL DISTRICT RISK RANKING")
@@ -236,7 +340,7 @@ print("\nFULL EARLY WARNING ZONES")
 print(early_warning_zones)
 
 print("\nOUTPUT FILES GENERATED IN:", OUTPUT_DIR)
-print(" - full_ml_scored_data.csv")
+print(" - full_ml_scored_data.parquet")
 print(" - district_risk_ranking.csv")
 print(" - top_policy_alerts.csv")
 print(" - early_warning_zones.csv")
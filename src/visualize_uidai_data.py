@@ -1,25 +1,24 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
-import os
 
 # ==================================================
 # PATH SETUP
 # ==================================================
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_DIR = os.path.join(BASE_DIR, "..", "outputs")
-DATA_PATH = os.path.join(OUTPUT_DIR, "full_ml_scored_data.csv")
+DATA_PATH = os.path.join(OUTPUT_DIR, "full_ml_scored_data.parquet")
+VIZ_COLUMNS = [
+    "state", "district", "severity", "is_severe",
+    "early_warning", "impact_score", "reason"
+]
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-# ==================================================
-# LOAD DATA
-# ==================================================
-df = pd.read_csv(DATA_PATH)
-
-TOTAL = len(df)
-SEVERE = (df["severity"] == "SEVERE").sum()
-EARLY = df["early_warning"].sum()
-
 # ==================================================
 # GLOBAL PLOT SETTINGS (PROFESSIONAL LOOK)
 # ==================================================
@@ -31,135 +30,193 @@ plt.rcParams.update({
     "ytick.labelsize": 9
 })
 
+# Each visual is rendered in its own worker process (matplotlib is not
+# thread-safe) and only receives the small, precomputed series it plots.
+
+
 # ==================================================
 # VISUAL 1: SEVERITY DISTRIBUTION (DONUT CHART)
 # ==================================================
-severity_pct = df["severity"].value_counts(normalize=True) * 100
+def plot_severity_donut(severity_pct):
+    plt.figure()
+    plt.pie(
+        severity_pct,
+        labels=severity_pct.index,
+        autopct="%.1f%%",
+        startangle=90,
+        colors=["#4CAF50", "#FFC107", "#F44336"],
+        wedgeprops=dict(width=0.4)
+    )
+    plt.title("Severity Distribution of Demographic Records (%)")
+    plt.tight_layout()
+    plt.savefig(os.path.join(OUTPUT_DIR, "viz_01_severity_donut.png"), dpi=200)
+    plt.close()
 
-plt.figure()
-plt.pie(
-    severity_pct,
-    labels=severity_pct.index,
-    autopct="%.1f%%",
-    startangle=90,
-    colors=["#4CAF50", "#FFC107", "#F44336"],
-    wedgeprops=dict(width=0.4)
-)
-plt.title("Severity Distribution of Demographic Records (%)")
-plt.tight_layout()
-plt.savefig(os.path.join(OUTPUT_DIR, "viz_01_severity_donut.png"), dpi=200)
-plt.close()
 
 # ==================================================
 # VISUAL 2: STATE SHARE OF SEVERE ANOMALIES (GRADIENT BAR)
 # ==================================================
-state_severe = (
-    df[df["severity"] == "SEVERE"]
-    .groupby("state")
-    .size()
-    .sort_values(ascending=False)
-    .head(10)
-)
+def plot_state_severe(state_severe_pct):
+    colors = plt.cm.Reds(state_severe_pct / state_severe_pct.max())
 
-state_severe_pct = (state_severe / SEVERE) * 100
-colors = plt.cm.Reds(state_severe_pct / state_severe_pct.max())
+    plt.figure()
+    bars = plt.bar(state_severe_pct.index, state_severe_pct.values, color=colors)
+    plt.title("Top 10 States Contributing to Severe Anomalies (%)")
+    plt.ylabel("Share of National Severe Anomalies")
+    plt.xticks(rotation=45, ha="right")
 
-plt.figure()
-bars = plt.bar(state_severe_pct.index, state_severe_pct.values, color=colors)
-plt.title("Top 10 States Contributing to Severe Anomalies (%)")
-plt.ylabel("Share of National Severe Anomalies")
-plt.xticks(rotation=45, ha="right")
+    for bar, val in zip(bars, state_severe_pct.values):
+        plt.text(bar.get_x() + bar.get_width()/2, bar.get_height(),
+                 f"{val:.1f}%", ha="center", va="bottom", fontsize=8)
 
-for bar, val in zip(bars, state_severe_pct.values):
-    plt.text(bar.get_x() + bar.get_width()/2, bar.get_height(),
-             f"{val:.1f}%", ha="center", va="bottom", fontsize=8)
+    plt.tight_layout()
+    plt.savefig(os.path.join(OUTPUT_DIR, "viz_02_state_severe_gradient.png"), dpi=200)
+    plt.close()
 
-plt.tight_layout()
-plt.savefig(os.path.join(OUTPUT_DIR, "viz_02_state_severe_gradient.png"), dpi=200)
-plt.close()
 
 # ==================================================
 # VISUAL 3: DISTRICT PRIORITY MATRIX (IMPACT BARH)
 # ==================================================
-district_impact = (
-    df[df["severity"] == "SEVERE"]
-    .groupby("district")["impact_score"]
-    .mean()
-    .sort_values(ascending=False)
-    .head(10)
-)
-
-plt.figure()
-bars = plt.barh(
-    district_impact.index,
-    district_impact.values,
-    color=plt.cm.Blues(district_impact.values / district_impact.max())
-)
-plt.gca().invert_yaxis()
-plt.title("Top 10 Districts by Average Impact Score")
-plt.xlabel("Impact Score")
-
-for bar in bars:
-    plt.text(bar.get_width(), bar.get_y() + bar.get_height()/2,
-             f"{bar.get_width():.2f}", va="center", fontsize=8)
-
-plt.tight_layout()
-plt.savefig(os.path.join(OUTPUT_DIR, "viz_03_district_impact_priority.png"), dpi=200)
-plt.close()
+def plot_district_impact(district_impact):
+    plt.figure()
+    bars = plt.barh(
+        district_impact.index,
+        district_impact.values,
+        color=plt.cm.Blues(district_impact.values / district_impact.max())
+    )
+    plt.gca().invert_yaxis()
+    plt.title("Top 10 Districts by Average Impact Score")
+    plt.xlabel("Impact Score")
+
+    for bar in bars:
+        plt.text(bar.get_width(), bar.get_y() + bar.get_height()/2,
+                 f"{bar.get_width():.2f}", va="center", fontsize=8)
+
+    plt.tight_layout()
+    plt.savefig(os.path.join(OUTPUT_DIR, "viz_03_district_impact_priority.png"), dpi=200)
+    plt.close()
+
 
 # ==================================================
 # VISUAL 4: ROOT CAUSE COMPOSITION (STACKED % BAR)
 # ==================================================
-reason_pct = (
-    df[df["severity"] == "SEVERE"]["reason"]
-    .value_counts(normalize=True) * 100
-)
+def plot_root_causes(reason_pct):
+    plt.figure()
+    plt.bar(reason_pct.index, reason_pct.values, color="#673AB7")
+    plt.title("Root Cause Composition of Severe Anomalies (%)")
+    plt.ylabel("Percentage")
+    plt.xticks(rotation=45, ha="right")
 
-plt.figure()
-plt.bar(reason_pct.index, reason_pct.values, color="#673AB7")
-plt.title("Root Cause Composition of Severe Anomalies (%)")
-plt.ylabel("Percentage")
-plt.xticks(rotation=45, ha="right")
+    for i, v in enumerate(reason_pct.values):
+        plt.text(i, v, f"{v:.1f}%", ha="center", va="bottom", fontsize=8)
 
-for i, v in enumerate(reason_pct.values):
-    plt.text(i, v, f"{v:.1f}%", ha="center", va="bottom", fontsize=8)
+    plt.tight_layout()
+    plt.savefig(os.path.join(OUTPUT_DIR, "viz_04_root_cause_composition.png"), dpi=200)
+    plt.close()
 
-plt.tight_layout()
-plt.savefig(os.path.join(OUTPUT_DIR, "viz_04_root_cause_composition.png"), dpi=200)
-plt.close()
 
 # ==================================================
 # VISUAL 5: PREVENTION VIEW (EARLY VS SEVERE)
 # ==================================================
-labels = ["Early Warning", "Severe"]
-values = [EARLY, SEVERE]
-colors = ["#03A9F4", "#E53935"]
+def plot_prevention_view(early, severe):
+    labels = ["Early Warning", "Severe"]
+    values = [early, severe]
+    colors = ["#03A9F4", "#E53935"]
+
+    plt.figure()
+    bars = plt.bar(labels, values, color=colors)
+    plt.title("Preventive Signals vs Confirmed Severe Anomalies")
+    plt.ylabel("Number of Records")
 
-plt.figure()
-bars = plt.bar(labels, values, color=colors)
-plt.title("Preventive Signals vs Confirmed Severe Anomalies")
-plt.ylabel("Number of Records")
+    for bar, val in zip(bars, values):
+        plt.text(bar.get_x() + bar.get_width()/2, bar.get_height(),
+                 f"{val}", ha="center", va="bottom", fontsize=9)
 
-for bar, val in zip(bars, values):
-    plt.text(bar.get_x() + bar.get_width()/2, bar.get_height(),
-             f"{val}", ha="center", va="bottom", fontsize=9)
+    plt.tight_layout()
+    plt.savefig(os.path.join(OUTPUT_DIR, "viz_05_prevention_view.png"), dpi=200)
+    plt.close()
 
-plt.tight_layout()
-plt.savefig(os.path.join(OUTPUT_DIR, "viz_05_prevention_view.png"), dpi=200)
-plt.close()
 
 # ==================================================
 # VISUAL 6: IMPACT SCORE RISK TAIL (HIGHLIGHTED HISTOGRAM)
 # ==================================================
-plt.figure()
-plt.hist(df["impact_score"], bins=30, color="#607D8B", edgecolor="black")
-plt.axvline(0.7, color="red", linestyle="--", label="High Impact Threshold")
-plt.title("Impact Score Distribution (Risk Tail Highlighted)")
-plt.xlabel("Impact Score")
-plt.ylabel("Number of Records")
-plt.legend()
-plt.tight_layout()
-plt.savefig(os.path.join(OUTPUT_DIR, "viz_06_impact_risk_tail.png"), dpi=200)
-plt.close()
-
-print("Advanced, publication-grade visualizations saved to outputs folder")
+def plot_impact_tail(impact_scores):
+    plt.figure()
+    plt.hist(impact_scores, bins=30, color="#607D8B", edgecolor="black")
+    plt.axvline(0.7, color="red", linestyle="--", label="High Impact Threshold")
+    plt.title("Impact Score Distribution (Risk Tail Highlighted)")
+    plt.xlabel("Impact Score")
+    plt.ylabel("Number of Records")
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(os.path.join(OUTPUT_DIR, "viz_06_impact_risk_tail.png"), dpi=200)
+    plt.close()
+
+
+def main():
+    # ==================================================
+    # LOAD DATA
+    # ==================================================
+    df = pd.read_parquet(DATA_PATH, columns=VIZ_COLUMNS)
+
+    severe_df = df[df["is_severe"]]
+
+    severe_count = len(severe_df)
+    early_count = df["early_warning"].sum()
+
+    # ==================================================
+    # AGGREGATIONS (ONCE, IN THE PARENT PROCESS)
+    # ==================================================
+    severity_pct = df["severity"].value_counts(normalize=True) * 100
+
+    # one pass over the severe records; the state and district views are
+    # rolled up from this small (state, district) table
+    severe_by_area = (
+        severe_df
+        .groupby(["state", "district"], observed=True, sort=False)["impact_score"]
+        .agg(["size", "sum"])
+    )
+
+    state_severe = (
+        severe_by_area["size"]
+        .groupby(level="state", observed=True, sort=False)
+        .sum()
+        .sort_values(ascending=False)
+        .head(10)
+    )
+    state_severe_pct = (state_severe / severe_count) * 100
+
+    district_totals = severe_by_area.groupby(level="district", observed=True, sort=False).sum()
+    district_impact = (
+        (district_totals["sum"] / district_totals["size"])
+        .sort_values(ascending=False)
+        .head(10)
+    )
+
+    reason_pct = (
+        severe_df["reason"]
+        .value_counts(normalize=True) * 100
+    )
+
+    # ==================================================
+    # RENDER (ONE FIGURE PER WORKER)
+    # ==================================================
+    jobs = [
+        (plot_severity_donut, severity_pct),
+        (plot_state_severe, state_severe_pct),
+        (plot_district_impact, district_impact),
+        (plot_root_causes, reason_pct),
+        (plot_prevention_view, early_count, severe_count),
+        (plot_impact_tail, df["impact_score"].to_numpy()),
+    ]
+
+    with ProcessPoolExecutor() as pool:
+        futures = [pool.submit(fn, *args) for fn, *args in jobs]
+        for future in futures:
+            future.result()
+
+    print("Advanced, publication-grade visualizations saved to outputs folder")
+
+
+if __name__ == "__main__":
+    main()